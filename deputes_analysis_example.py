@@ -4,41 +4,212 @@ Exemple d'analyse des données des députés téléchargées
 Montre comment exploiter les données une fois téléchargées
 """
 
+import csv
+import hashlib
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyarrow import csv as pa_csv
+import re
 from collections import Counter
+from pathlib import Path
+
+from deputes_csv import write_csv
+
+try:
+    from numba import njit
+except ImportError:  # numba est optionnel : le code Python pur donne le même résultat
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# Colonnes lues pour l'analyse (les autres ne sont chargées que pour les exports)
+ANALYSIS_COLUMNS = ("parti_ratt_financier", "sexe", "nom_circo", "profession", "age", "nom")
+
+# Types imposés à la lecture du CSV (les autres colonnes sont lues comme texte)
+CSV_COLUMN_TYPES = {
+    'age': pa.float32(),
+    'sexe': pa.dictionary(pa.int32(), pa.string()),
+    'parti_ratt_financier': pa.dictionary(pa.int32(), pa.string()),
+}
+
+# Colonnes dont les effectifs sont comptés pendant la lecture
+COUNTED_COLUMNS = ('parti_ratt_financier', 'sexe', 'profession')
+
+# Colonnes à faible cardinalité converties en 'category' après chargement
+CATEGORY_COLUMNS = ('parti_ratt_financier', 'sexe', 'profession', 'nom_circo')
+
+# Colonnes représentées dans les graphiques
+PLOT_COLUMNS = ('parti_ratt_financier', 'sexe', 'age', 'profession')
+
+# Numéro de département dans le nom de circonscription (ex: "75", "2A", "971")
+DEPARTEMENT_PATTERN = re.compile(r'(\d{2,3}[A-Z]?)')
+
+@njit(cache=True)
+def _age_histogram(ages, bins):
+    """
+    Histogramme des âges en deux passes sur le tableau, sans copie des NaN
+    
+    Returns:
+        Tuple (effectifs par classe, âge moyen, borne basse, borne haute) ;
+        effectifs nuls et bornes NaN si aucun âge n'est renseigné
+    """
+    n = 0
+    total = 0.0
+    low = np.inf
+    high = -np.inf
+    for x in ages:
+        if not np.isnan(x):
+            n += 1
+            total += x
+            if x < low:
+                low = x
+            if x > high:
+                high = x
+    
+    counts = np.zeros(bins, np.int64)
+    if n == 0:
+        return counts, np.nan, np.nan, np.nan
+    
+    # Âges tous identiques : intervalle élargi à [min - 0.5, max + 0.5] comme numpy
+    if high == low:
+        low -= 0.5
+        high += 0.5
+    span = high - low
+    for x in ages:
+        if not np.isnan(x):
+            i = int((x - low) / span * bins)
+            # L'âge maximum appartient à la dernière classe, comme avec numpy
+            if i >= bins:
+                i = bins - 1
+            counts[i] += 1
+    return counts, total / n, low, high
+
+def _empty_strings_to_null(batch):
+    """
+    Remplace les chaînes vides d'un lot Arrow par des valeurs manquantes
+    
+    NosDéputés renvoie "" pour les champs non renseignés ; pandas les
+    lisait comme NaN, ce qui les excluait des effectifs et des exports.
+    Le remplacement est vectorisé par les noyaux de calcul d'Arrow.
+    """
+    columns = []
+    for column in batch.columns:
+        is_dictionary = pa.types.is_dictionary(column.type)
+        values = column.dictionary_decode() if is_dictionary else column
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            values = pc.if_else(pc.equal(values, ''), pa.scalar(None, values.type), values)
+            column = pc.dictionary_encode(values) if is_dictionary else values
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+def _open_batches(csv_file, wanted=None):
+    """
+    Ouvre les données en lots Arrow, limités aux colonnes demandées
+    
+    Les chaînes vides des lots sont déjà remplacées par des valeurs manquantes.
+    
+    Le fichier Parquet voisin est préféré s'il existe, sinon le CSV est
+    lu en flux par le lecteur incrémental d'Arrow.
+    
+    Args:
+        csv_file: Fichier CSV avec les données des députés
+        wanted: Colonnes à lire (toutes si None ; les absentes sont ignorées)
+    
+    Returns:
+        Tuple (colonnes du fichier, colonnes lues, itérateur de lots)
+    """
+    parquet_file = Path(csv_file).with_suffix('.parquet')
+    if parquet_file.exists():
+        parquet = pq.ParquetFile(parquet_file)
+        names = parquet.schema_arrow.names
+        columns = names if wanted is None else [c for c in wanted if c in names]
+        return names, columns, map(_empty_strings_to_null, parquet.iter_batches(columns=columns))
+    
+    # L'en-tête seul suffit pour savoir quelles colonnes demander ; les
+    # colonnes lues sont toutes typées, car le type déduit du premier lot
+    # peut ne plus convenir aux lots suivants
+    # ('utf-8-sig' : les exports par parti commencent par un BOM)
+    with open(csv_file, encoding='utf-8-sig', newline='') as f:
+        names = next(csv.reader(f))
+    columns = names if wanted is None else [c for c in wanted if c in names]
+    column_types = {name: CSV_COLUMN_TYPES.get(name, pa.string()) for name in columns}
+    reader = pa_csv.open_csv(
+        csv_file,
+        convert_options=pa_csv.ConvertOptions(column_types=column_types,
+                                              include_columns=columns,
+                                              strings_can_be_null=True)
+    )
+    return names, columns, map(_empty_strings_to_null, reader)
+
+def _batches_to_dataframe(batches, columns):
+    """Assemble les lots lus en DataFrame (index aligné sur les lignes du fichier)"""
+    if not batches:
+        return pd.DataFrame(columns=columns)
+    return pa.Table.from_batches(batches).to_pandas()
+
+def load_full_records(csv_file="deputes_france.csv"):
+    """
+    Charge toutes les colonnes des députés, pour les exports
+    
+    L'index est celui du DataFrame retourné par analyze_deputes_data sur
+    le même fichier : les lignes d'un groupe s'y retrouvent avec .loc.
+    
+    Args:
+        csv_file: Fichier CSV avec les données des députés
+    """
+    _, columns, batches = _open_batches(csv_file)
+    return _batches_to_dataframe(list(batches), columns)
 
 def analyze_deputes_data(csv_file="deputes_france.csv"):
     """
     Analyse les données des députés téléchargées
     
+    Le fichier Parquet voisin (même nom, extension .parquet) est utilisé
+    s'il existe. Seules les colonnes utiles à l'analyse sont lues, lot par
+    lot, et les effectifs sont comptés au fil de la lecture. Pour exporter
+    les fiches complètes, voir load_full_records().
+    
     Args:
         csv_file: Fichier CSV avec les données des députés
     """
     try:
-        df = pd.read_csv(csv_file, encoding='utf-8-sig')
+        names, columns, batches = _open_batches(csv_file, ANALYSIS_COLUMNS)
+        counters = {col: Counter() for col in COUNTED_COLUMNS if col in columns}
+        read_batches = []
+        for batch in batches:
+            for col, counter in counters.items():
+                counter.update(v for v in batch.column(col).to_pylist() if v is not None)
+            read_batches.append(batch)
+        
+        df = _batches_to_dataframe(read_batches, columns)
+        
+        # Les value_counts travaillent alors sur des codes entiers
+        for col in CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
         print(f"📊 Analyse de {len(df)} députés")
         print("-" * 40)
         
         # 1. Informations générales
         print("📋 INFORMATIONS GÉNÉRALES")
         print(f"   Nombre total de députés: {len(df)}")
-        print(f"   Colonnes disponibles: {len(df.columns)}")
+        print(f"   Colonnes disponibles: {len(names)}")
         
         # 2. Répartition par parti politique
         if 'parti_ratt_financier' in df.columns:
             print("\n🎨 RÉPARTITION PAR PARTI")
-            parti_counts = df['parti_ratt_financier'].value_counts()
-            for parti, count in parti_counts.head(10).items():
+            for parti, count in counters['parti_ratt_financier'].most_common(10):
                 percentage = (count / len(df)) * 100
                 print(f"   {parti}: {count} députés ({percentage:.1f}%)")
         
         # 3. Répartition par sexe
         if 'sexe' in df.columns:
             print("\n👥 RÉPARTITION PAR SEXE")
-            sexe_counts = df['sexe'].value_counts()
-            for sexe, count in sexe_counts.items():
+            for sexe, count in counters['sexe'].most_common():
                 percentage = (count / len(df)) * 100
                 print(f"   {sexe}: {count} députés ({percentage:.1f}%)")
         
@@ -46,25 +217,38 @@ def analyze_deputes_data(csv_file="deputes_france.csv"):
         if 'nom_circo' in df.columns:
             print("\n🗺️  TOP 10 DÉPARTEMENTS")
             # Extraire le département du nom de circonscription
-            df['departement'] = df['nom_circo'].str.extract(r'(\d{2,3}[A-Z]?)')
-            dept_counts = df['departement'].value_counts()
-            for dept, count in dept_counts.head(10).items():
+            # (une seule fois par circonscription distincte)
+            circos = df['nom_circo'].cat
+            matches = (DEPARTEMENT_PATTERN.search(circo) for circo in circos.categories)
+            # Dernière entrée None : le code -1 (valeur manquante) y renvoie
+            departements = np.array([m.group(1) if m else None for m in matches] + [None],
+                                    dtype=object)
+            df['departement'] = departements[circos.codes.to_numpy()]
+            dept_counts = Counter(df['departement'].dropna())
+            for dept, count in dept_counts.most_common(10):
                 print(f"   {dept}: {count} députés")
         
         # 5. Analyse des professions
         if 'profession' in df.columns:
             print("\n💼 TOP 10 PROFESSIONS")
-            prof_counts = df['profession'].value_counts()
-            for prof, count in prof_counts.head(10).items():
+            for prof, count in counters['profession'].most_common(10):
                 print(f"   {prof}: {count} députés")
         
         # 6. Statistiques d'âge (si disponible)
         if 'age' in df.columns:
             print("\n📊 STATISTIQUES D'ÂGE")
-            print(f"   Âge moyen: {df['age'].mean():.1f} ans")
-            print(f"   Âge médian: {df['age'].median():.0f} ans")
-            print(f"   Plus jeune: {df['age'].min():.0f} ans")
-            print(f"   Plus âgé: {df['age'].max():.0f} ans")
+            # Les quatre agrégats sont calculés en un seul parcours Polars
+            age = pl.col('age').cast(pl.Float64)
+            age_stats = pl.from_pandas(df[['age']]).lazy().select(
+                age.mean().alias('moyen'),
+                age.median().alias('median'),
+                age.min().alias('min'),
+                age.max().alias('max'),
+            ).fill_null(float('nan')).collect().row(0, named=True)
+            print(f"   Âge moyen: {age_stats['moyen']:.1f} ans")
+            print(f"   Âge médian: {age_stats['median']:.0f} ans")
+            print(f"   Plus jeune: {age_stats['min']:.0f} ans")
+            print(f"   Plus âgé: {age_stats['max']:.0f} ans")
         
         return df
         
@@ -76,21 +260,64 @@ def analyze_deputes_data(csv_file="deputes_france.csv"):
         print(f"❌ Erreur lors de l'analyse: {e}")
         return None
 
+def _value_counts_polars(df, columns):
+    """
+    Compte les valeurs de plusieurs colonnes en une seule exécution Polars
+    
+    Les requêtes sont collectées ensemble et s'exécutent en parallèle.
+    
+    Returns:
+        Dictionnaire colonne -> Series des effectifs, triée par ordre décroissant
+    """
+    columns = [c for c in columns if c in df.columns]
+    if not columns:
+        return {}
+    
+    lf = pl.from_pandas(df[columns]).lazy()
+    frames = pl.collect_all([
+        lf.select(pl.col(c).drop_nulls().value_counts(sort=True)).unnest(c)
+        for c in columns
+    ])
+    return {
+        c: pd.Series(frame['count'].to_numpy(), index=frame[c].to_list(), name=c)
+        for c, frame in zip(columns, frames)
+    }
+
 def create_visualizations(df):
     """
     Crée des visualisations des données
     
+    L'image est nommée d'après une empreinte des colonnes représentées :
+    si elle existe déjà, le rendu n'est pas refait.
+    
     Args:
         df: DataFrame avec les données des députés
     """
     try:
+        plotted = df[[c for c in PLOT_COLUMNS if c in df.columns]]
+        fingerprint = hashlib.blake2b(
+            pd.util.hash_pandas_object(plotted, index=False).values.tobytes(),
+            digest_size=8
+        ).hexdigest()
+        output_file = Path(f'analyse_deputes_{fingerprint}.png')
+        if output_file.exists():
+            print(f"📈 Graphiques déjà à jour dans '{output_file}'")
+            return
+        
+        # Import tardif, backend sans interface graphique
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        
+        counts = _value_counts_polars(df, ['parti_ratt_financier', 'sexe', 'profession'])
+        
         plt.style.use('default')
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         fig.suptitle('Analyse des Députés de l\'Assemblée Nationale', fontsize=16)
         
         # 1. Répartition par parti (top 10)
         if 'parti_ratt_financier' in df.columns:
-            parti_counts = df['parti_ratt_financier'].value_counts().head(10)
+            parti_counts = counts['parti_ratt_financier'].head(10)
             axes[0, 0].barh(range(len(parti_counts)), parti_counts.values)
             axes[0, 0].set_yticks(range(len(parti_counts)))
             axes[0, 0].set_yticklabels(parti_counts.index, fontsize=8)
@@ -99,23 +326,31 @@ def create_visualizations(df):
         
         # 2. Répartition par sexe
         if 'sexe' in df.columns:
-            sexe_counts = df['sexe'].value_counts()
+            sexe_counts = counts['sexe']
             axes[0, 1].pie(sexe_counts.values, labels=sexe_counts.index, autopct='%1.1f%%')
             axes[0, 1].set_title('Répartition par Sexe')
         
         # 3. Distribution des âges
         if 'age' in df.columns:
-            axes[1, 0].hist(df['age'].dropna(), bins=20, alpha=0.7, edgecolor='black')
-            axes[1, 0].set_title('Distribution des Âges')
-            axes[1, 0].set_xlabel('Âge')
-            axes[1, 0].set_ylabel('Nombre de députés')
-            axes[1, 0].axvline(df['age'].mean(), color='red', linestyle='--', 
-                              label=f'Moyenne: {df["age"].mean():.1f}')
-            axes[1, 0].legend()
+            ages = df['age'].to_numpy(dtype=np.float64, na_value=np.nan)
+            age_counts, age_mean, age_low, age_high = _age_histogram(ages, 20)
+            if age_counts.sum() == 0:
+                # Aucun âge renseigné : pas de bornes, sous-graphique masqué
+                axes[1, 0].set_axis_off()
+            else:
+                edges = np.linspace(age_low, age_high, len(age_counts) + 1)
+                axes[1, 0].bar(edges[:-1], age_counts, width=np.diff(edges), align='edge',
+                               alpha=0.7, edgecolor='black')
+                axes[1, 0].set_title('Distribution des Âges')
+                axes[1, 0].set_xlabel('Âge')
+                axes[1, 0].set_ylabel('Nombre de députés')
+                axes[1, 0].axvline(age_mean, color='red', linestyle='--', 
+                                  label=f'Moyenne: {age_mean:.1f}')
+                axes[1, 0].legend()
         
         # 4. Top 10 professions
         if 'profession' in df.columns:
-            prof_counts = df['profession'].value_counts().head(10)
+            prof_counts = counts['profession'].head(10)
             axes[1, 1].barh(range(len(prof_counts)), prof_counts.values)
             axes[1, 1].set_yticks(range(len(prof_counts)))
             axes[1, 1].set_yticklabels(prof_counts.index, fontsize=8)
@@ -123,8 +358,9 @@ def create_visualizations(df):
             axes[1, 1].set_xlabel('Nombre de députés')
         
         plt.tight_layout()
-        plt.savefig('analyse_deputes.png', dpi=300, bbox_inches='tight')
-        print("📈 Graphiques sauvés dans 'analyse_deputes.png'")
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+        print(f"📈 Graphiques sauvés dans '{output_file}'")
         
     except Exception as e:
         print(f"❌ Erreur lors de la création des graphiques: {e}")
@@ -135,25 +371,32 @@ def search_deputies(df, search_term):
     
     Args:
         df: DataFrame avec les données des députés
-        search_term: Terme de recherche
+        search_term: Terme de recherche (sous-chaîne, insensible à la casse)
     """
     if 'nom' in df.columns:
-        results = df[df['nom'].str.contains(search_term, case=False, na=False)]
+        # Recherche littérale (sans regex) sur les noms en minuscules
+        noms = df['nom'].fillna('').astype(str).str.lower().to_numpy(dtype=str)
+        results = df[np.char.find(noms, search_term.lower()) >= 0]
         
         print(f"🔍 Résultats pour '{search_term}':")
         if len(results) > 0:
-            for _, depute in results.iterrows():
-                print(f"   - {depute['nom']}")
-                if 'nom_circo' in depute:
-                    print(f"     Circonscription: {depute['nom_circo']}")
-                if 'parti_ratt_financier' in depute:
-                    print(f"     Parti: {depute['parti_ratt_financier']}")
+            # Accès direct aux tableaux : pas de Series construite par ligne
+            missing = [None] * len(results)
+            circos = results['nom_circo'].to_numpy() if 'nom_circo' in results.columns else missing
+            partis = (results['parti_ratt_financier'].to_numpy()
+                      if 'parti_ratt_financier' in results.columns else missing)
+            for nom, circo, parti in zip(results['nom'].to_numpy(), circos, partis):
+                print(f"   - {nom}")
+                if 'nom_circo' in results.columns:
+                    print(f"     Circonscription: {circo}")
+                if 'parti_ratt_financier' in results.columns:
+                    print(f"     Parti: {parti}")
         else:
             print("   Aucun résultat trouvé")
     
     return results if 'nom' in df.columns else pd.DataFrame()
 
-def export_by_party(df, party_name, output_file=None):
+def export_by_party(df, party_name, output_file=None, groups=None, records=None):
     """
     Exporte la liste des députés d'un parti spécifique
     
@@ -161,14 +404,24 @@ def export_by_party(df, party_name, output_file=None):
         df: DataFrame avec les données des députés
         party_name: Nom du parti
         output_file: Fichier de sortie (optionnel)
+        groups: Dictionnaire parti -> DataFrame déjà groupé (optionnel)
+        records: Fiches complètes alignées sur df, voir load_full_records()
+                 (optionnel : l'export contient alors toutes les colonnes)
     """
     if 'parti_ratt_financier' in df.columns:
-        party_deputies = df[df['parti_ratt_financier'].str.contains(party_name, case=False, na=False)]
+        if groups is not None and party_name in groups:
+            party_deputies = groups[party_name]
+        else:
+            party_deputies = df[df['parti_ratt_financier'].str.contains(party_name, case=False, na=False)]
         
         if output_file is None:
             output_file = f"deputes_{party_name.replace(' ', '_').lower()}.csv"
         
-        party_deputies.to_csv(output_file, index=False, encoding='utf-8-sig')
+        if records is not None:
+            party_deputies = records.loc[party_deputies.index]
+        
+        # Export destiné à Excel : BOM UTF-8 conservé
+        write_csv(party_deputies, output_file, bom=True)
         print(f"📋 {len(party_deputies)} députés de '{party_name}' exportés vers {output_file}")
         
         return party_deputies
@@ -195,15 +448,20 @@ def main():
         # Exemple d'export par parti
         print("\n📤 EXEMPLE D'EXPORT PAR PARTI")
         if 'parti_ratt_financier' in df.columns:
-            parties = df['parti_ratt_financier'].value_counts().head(3)
-            for party in parties.index:
-                export_by_party(df, party)
+            # Un seul regroupement : il donne à la fois le classement et les exports
+            groups = dict(list(df.groupby('parti_ratt_financier', sort=False, observed=True)))
+            top_parties = sorted(groups, key=lambda party: len(groups[party]), reverse=True)[:3]
+            # L'analyse n'a lu que ses colonnes : les exports reprennent les fiches complètes
+            records = load_full_records()
+            for party in top_parties:
+                export_by_party(df, party, groups=groups, records=records)
         
         print("\n🎉 Analyse terminée!")
         print("\n💡 Fonctions disponibles:")
         print("   - analyze_deputes_data(): Analyse générale")
         print("   - search_deputies(): Recherche par nom")
         print("   - export_by_party(): Export par parti")
+        print("   - load_full_records(): Fiches complètes pour les exports")
         print("   - create_visualizations(): Graphiques")
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+"""
+Écriture des fichiers CSV des députés via le writer C++ d'Arrow
+Module partagé par les scripts de téléchargement et d'analyse
+"""
+
+import codecs
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+
+def _to_text(value):
+    """Convertit une valeur en texte, en conservant les valeurs manquantes"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, dict, np.ndarray)):
+        return str(value)
+    return None if pd.isna(value) else str(value)
+
+
+def write_csv(df: pd.DataFrame, output_file, bom: bool = False) -> None:
+    """
+    Écrit un DataFrame en CSV UTF-8 via le writer C++ d'Arrow
+
+    Args:
+        df: DataFrame à écrire
+        output_file: Chemin du fichier CSV
+        bom: Ajoute un BOM UTF-8 en tête (exports destinés à Excel)
+    """
+    # Les colonnes objet peuvent mêler types simples, listes et dictionnaires
+    # (données NosDéputés, synthèse au schéma inconnu) : Arrow les refuse,
+    # on les écrit donc en texte comme le faisait pandas
+    object_columns = [col for col in df.columns if df[col].dtype == object]
+    if object_columns:
+        df = df.assign(**{col: df[col].map(_to_text) for col in object_columns})
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Les colonnes catégorielles (dictionnaires Arrow) sont décodées en valeurs
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+
+    write_options = pa_csv.WriteOptions(include_header=True)
+    if bom:
+        with open(output_file, 'wb') as f:
+            f.write(codecs.BOM_UTF8)
+            pa_csv.write_csv(table, f, write_options=write_options)
+    else:
+        pa_csv.write_csv(table, output_file, write_options=write_options)
@@ -4,30 +4,77 @@ Script pour télécharger la liste des députés de l'Assemblée nationale fran
 Utilise plusieurs sources de données officielles et ouvertes
 """
 
-import requests
+import asyncio
+import io
+import hishel
+import orjson
 import pandas as pd
 import json
 import xml.etree.ElementTree as ET
 from pathlib import Path
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from deputes_csv import write_csv
+from deputes_schema import deputes_to_dataframe
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Colonnes encodées en dictionnaire dans le Parquet unifié
+UNIFIED_DICTIONARY_COLUMNS = ('parti_ratt_financier', 'sexe', 'profession', 'nom_circo')
+
+
 class DeputesDownloader:
-    """Classe pour télécharger les données des députés depuis différentes sources"""
+    """
+    Classe pour télécharger les données des députés depuis différentes sources
+    
+    Les méthodes de téléchargement sont asynchrones et s'utilisent dans un
+    bloc ``async with DeputesDownloader() as downloader:``, qui ouvre le
+    client HTTP dans la boucle d'événements courante et le ferme à la sortie.
+    """
     
     def __init__(self, output_dir: str = "data_deputes"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Python-Deputes-Downloader/1.0'
-        })
+        # Créés à l'entrée du bloc async with, dans la boucle qui les utilise
+        self.client: Optional[hishel.AsyncCacheClient] = None
+        self.details_semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def __aenter__(self) -> "DeputesDownloader":
+        # Client asynchrone partagé : HTTP/2 et keep-alive sur nosdeputes.fr,
+        # avec un cache disque revalidé via ETag / Last-Modified
+        self.client = hishel.AsyncCacheClient(
+            storage=hishel.AsyncFileStorage(base_path=self.output_dir / "http_cache", ttl=3600),
+            http2=True,
+            timeout=30,
+            headers={'User-Agent': 'Python-Deputes-Downloader/1.0'}
+        )
+        # Limite le nombre de requêtes simultanées pour les détails des députés
+        self.details_semaphore = asyncio.Semaphore(16)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def close(self):
+        """Ferme le client HTTP et ses connexions"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
     
-    def download_from_nosdeputes(self, format_type: str = "csv") -> Optional[pd.DataFrame]:
+    def _require_client(self):
+        """Vérifie que le client HTTP a été ouvert par ``async with``"""
+        if self.client is None:
+            raise RuntimeError("Client HTTP non ouvert : utilisez 'async with DeputesDownloader() as downloader'")
+    
+    async def _get(self, url: str):
+        """Requête GET via le client ouvert par ``async with``"""
+        self._require_client()
+        return await self.client.get(url)
+    
+    async def download_from_nosdeputes(self, format_type: str = "csv") -> Optional[pd.DataFrame]:
         """
         Télécharge depuis NosDéputés.fr (source Regards Citoyens)
         
@@ -46,38 +93,32 @@ class DeputesDownloader:
             url = f"https://www.nosdeputes.fr/deputes/{format_type}"
         
         try:
-            response = self.session.get(url, timeout=30)
+            response = await self._get(url)
             response.raise_for_status()
             
             if format_type == "csv":
                 # Convert JSON response to CSV since CSV endpoint is empty
-                data = response.json()
+                data = orjson.loads(response.content)
                 if 'deputes' in data:
-                    deputes_data = []
-                    for depute_info in data['deputes']:
-                        depute = depute_info['depute']
-                        deputes_data.append(depute)
-                    df = pd.DataFrame(deputes_data)
+                    deputes_data = [d['depute'] for d in data['deputes']]
+                    df = deputes_to_dataframe(deputes_data)
                     output_file = self.output_dir / "deputes_nosdeputes.csv"
-                    df.to_csv(output_file, index=False, encoding='utf-8-sig')
+                    write_csv(df, output_file)
                     logger.info(f"Données sauvées dans {output_file}")
                     return df
                 else:
                     logger.warning("Aucune donnée de députés trouvée dans la réponse JSON")
                 
             elif format_type == "json":
-                data = response.json()
+                data = orjson.loads(response.content)
                 output_file = self.output_dir / "deputes_nosdeputes.json"
                 with open(output_file, 'w', encoding='utf-8') as f:
                     json.dump(data, f, indent=2, ensure_ascii=False)
                 
                 # Convertir en DataFrame si possible
                 if 'deputes' in data:
-                    deputes_data = []
-                    for depute_info in data['deputes']:
-                        depute = depute_info['depute']
-                        deputes_data.append(depute)
-                    df = pd.DataFrame(deputes_data)
+                    deputes_data = [d['depute'] for d in data['deputes']]
+                    df = deputes_to_dataframe(deputes_data)
                     return df
                     
             elif format_type == "xml":
@@ -91,7 +132,7 @@ class DeputesDownloader:
         
         return None
     
-    def download_from_datan(self) -> Optional[pd.DataFrame]:
+    async def download_from_datan(self) -> Optional[pd.DataFrame]:
         """
         Télécharge depuis NosDéputés avec statistiques enrichies
         (Alternative à Datan car l'URL originale n'est plus accessible)
@@ -101,14 +142,14 @@ class DeputesDownloader:
         url = "https://www.nosdeputes.fr/synthese/data/json"
         
         try:
-            response = self.session.get(url, timeout=30)
+            response = await self._get(url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if 'deputes' in data:
                 df = pd.DataFrame(data['deputes'])
                 output_file = self.output_dir / "deputes_datan_enrichi.csv"
-                df.to_csv(output_file, index=False, encoding='utf-8-sig')
+                write_csv(df, output_file)
                 logger.info(f"Données enrichies sauvées dans {output_file}")
                 return df
             else:
@@ -120,7 +161,7 @@ class DeputesDownloader:
         
         return None
     
-    def download_from_assemblee_officiel(self) -> Optional[pd.DataFrame]:
+    async def download_from_assemblee_officiel(self) -> Optional[pd.DataFrame]:
         """
         Télécharge depuis les données officielles de l'Assemblée nationale
         (URLs mises à jour pour la 17ème législature)
@@ -139,26 +180,25 @@ class DeputesDownloader:
                 
                 if "nosdeputes.fr" in url:
                     # Traitement spécial pour NosDéputés
-                    response = self.session.get(url, timeout=30)
+                    response = await self._get(url)
                     response.raise_for_status()
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     
                     if 'deputes' in data:
-                        deputes_data = []
-                        for depute_info in data['deputes']:
-                            depute = depute_info['depute']
-                            deputes_data.append(depute)
-                        df = pd.DataFrame(deputes_data)
+                        deputes_data = [d['depute'] for d in data['deputes']]
+                        df = deputes_to_dataframe(deputes_data)
                         
                         output_file = self.output_dir / "deputes_assemblee_officiel.csv"
-                        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+                        write_csv(df, output_file)
                         logger.info(f"Données officielles sauvées dans {output_file}")
                         return df
                 else:
                     # Traitement standard CSV
-                    df = pd.read_csv(url, encoding='utf-8', sep=';')
+                    response = await self._get(url)
+                    response.raise_for_status()
+                    df = pd.read_csv(io.StringIO(response.text), sep=';')
                     output_file = self.output_dir / "deputes_assemblee_officiel.csv"
-                    df.to_csv(output_file, index=False, encoding='utf-8-sig')
+                    write_csv(df, output_file)
                     logger.info(f"Données officielles sauvées dans {output_file}")
                     return df
                 
@@ -169,7 +209,7 @@ class DeputesDownloader:
         logger.warning("Sources officielles temporairement indisponibles")
         return None
     
-    def get_depute_details(self, slug_depute: str) -> Optional[Dict[Any, Any]]:
+    async def get_depute_details(self, slug_depute: str) -> Optional[Dict[Any, Any]]:
         """
         Récupère les détails d'un député spécifique depuis NosDéputés.fr
         
@@ -179,40 +219,67 @@ class DeputesDownloader:
         Returns:
             Dictionnaire avec les détails du député
         """
+        return await self._fetch_depute_details(slug_depute, self.details_semaphore)
+    
+    async def get_depute_details_bulk(self, slugs: List[str],
+                                      concurrency: int = 16) -> Dict[str, Optional[Dict[Any, Any]]]:
+        """
+        Récupère les détails de plusieurs députés en parallèle
+        
+        Les requêtes sont multiplexées sur la connexion HTTP/2 du client.
+        
+        Args:
+            slugs: Liste des slugs des députés
+            concurrency: Nombre maximal de requêtes simultanées
+        
+        Returns:
+            Dictionnaire slug -> détails du député (None en cas d'échec)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        details = await asyncio.gather(
+            *(self._fetch_depute_details(slug, semaphore) for slug in slugs)
+        )
+        return dict(zip(slugs, details))
+    
+    async def _fetch_depute_details(self, slug_depute: str,
+                                    semaphore: asyncio.Semaphore) -> Optional[Dict[Any, Any]]:
+        """Télécharge la fiche JSON d'un député, en respectant la limite de concurrence"""
         url = f"https://www.nosdeputes.fr/{slug_depute}/json"
         
         try:
-            response = self.session.get(url, timeout=30)
+            # Avant le sémaphore, qui n'existe pas non plus hors du bloc async with
+            self._require_client()
+            async with semaphore:
+                response = await self._get(url)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des détails de {slug_depute}: {e}")
         
         return None
     
-    def download_all_sources(self) -> Dict[str, Optional[pd.DataFrame]]:
+    async def download_all_sources(self) -> Dict[str, Optional[pd.DataFrame]]:
         """
-        Télécharge depuis toutes les sources disponibles
+        Télécharge depuis toutes les sources disponibles, en parallèle
         
         Returns:
             Dictionnaire avec les DataFrames de chaque source
         """
         logger.info("=== Début du téléchargement depuis toutes les sources ===")
         
-        results = {}
-        
-        # NosDéputés.fr (CSV)
-        results['nosdeputes_csv'] = self.download_from_nosdeputes('csv')
-        
-        # NosDéputés.fr (JSON)
-        results['nosdeputes_json'] = self.download_from_nosdeputes('json')
-        
-        # Datan (données enrichies)
-        results['datan'] = self.download_from_datan()
-        
-        # Assemblée nationale officielle
-        results['assemblee_officiel'] = self.download_from_assemblee_officiel()
+        sources = {
+            # NosDéputés.fr (CSV)
+            'nosdeputes_csv': self.download_from_nosdeputes('csv'),
+            # NosDéputés.fr (JSON)
+            'nosdeputes_json': self.download_from_nosdeputes('json'),
+            # Datan (données enrichies)
+            'datan': self.download_from_datan(),
+            # Assemblée nationale officielle
+            'assemblee_officiel': self.download_from_assemblee_officiel(),
+        }
+        dataframes = await asyncio.gather(*sources.values())
+        results = dict(zip(sources.keys(), dataframes))
         
         # Résumé
         logger.info("=== Résumé des téléchargements ===")
@@ -257,14 +324,30 @@ class DeputesDownloader:
                 logger.info("Tentative d'enrichissement avec les données Datan...")
             
             output_file = self.output_dir / "deputes_unifie.csv"
-            main_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            write_csv(main_df, output_file)
             logger.info(f"Dataset unifié sauvé dans {output_file}")
             
+            # Copie Parquet pour les analyses (lue en priorité par analyze_deputes_data)
+            parquet_file = output_file.with_suffix('.parquet')
+            try:
+                dictionary_columns = [c for c in UNIFIED_DICTIONARY_COLUMNS if c in main_df.columns]
+                main_df.to_parquet(parquet_file, engine='pyarrow', compression='zstd',
+                                   compression_level=3, use_dictionary=dictionary_columns)
+                logger.info(f"Dataset unifié sauvé dans {parquet_file}")
+            except Exception as e:
+                logger.warning(f"Échec de l'écriture Parquet {parquet_file}: {e}")
+            
             return main_df
         
         return None
 
 
+async def download_and_close(downloader: DeputesDownloader) -> Dict[str, Optional[pd.DataFrame]]:
+    """Télécharge toutes les sources puis ferme le client HTTP"""
+    async with downloader:
+        return await downloader.download_all_sources()
+
+
 def main():
     """Fonction principale"""
     print("🏛️  Téléchargeur de la liste des députés français")
@@ -274,7 +357,7 @@ def main():
     downloader = DeputesDownloader()
     
     # Télécharger depuis toutes les sources
-    results = downloader.download_all_sources()
+    results = asyncio.run(download_and_close(downloader))
     
     # Comparer les sources
     downloader.compare_sources(results)
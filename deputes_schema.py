@@ -0,0 +1,33 @@
+"""
+Schéma des données députés de NosDéputés.fr
+Module partagé par les scripts de téléchargement
+"""
+
+from typing import Any, Dict, List
+
+import pandas as pd
+
+# Colonnes renvoyées par https://www.nosdeputes.fr/deputes/json
+NOSDEPUTES_COLUMNS = (
+    'id', 'nom', 'nom_de_famille', 'prenom', 'sexe', 'date_naissance',
+    'lieu_naissance', 'num_deptmt', 'nom_circo', 'num_circo', 'mandat_debut',
+    'mandat_fin', 'ancien_depute', 'groupe_sigle', 'parti_ratt_financier',
+    'sites_web', 'emails', 'adresses', 'collaborateurs', 'autres_mandats',
+    'anciens_autres_mandats', 'anciens_mandats', 'profession',
+    'place_en_hemicycle', 'url_an', 'id_an', 'slug', 'url_nosdeputes',
+    'url_nosdeputes_api', 'nb_mandats', 'twitter',
+)
+
+# Types fixés après construction du DataFrame
+NOSDEPUTES_DTYPES = {'sexe': 'category', 'parti_ratt_financier': 'category'}
+
+
+def deputes_to_dataframe(deputes_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Construit le DataFrame des députés NosDéputés avec un schéma fixe
+
+    Les colonnes étant connues, pandas n'a pas à les découvrir dans
+    chaque dictionnaire.
+    """
+    df = pd.DataFrame.from_records(deputes_data, columns=NOSDEPUTES_COLUMNS)
+    return df.astype(NOSDEPUTES_DTYPES)
@@ -4,8 +4,30 @@ Script simple pour télécharger la liste des députés français
 Version rapide et minimaliste
 """
 
+import orjson
 import pandas as pd
-import requests
+import requests_cache
+from pathlib import Path
+
+from deputes_csv import write_csv
+from deputes_schema import deputes_to_dataframe
+
+# Session HTTP avec cache disque, créée au premier téléchargement
+_session = None
+
+def get_session():
+    """
+    Retourne la session HTTP avec cache disque (revalidation via les en-têtes du serveur)
+    
+    La base 'deputes_http_cache.sqlite' n'est créée qu'au premier appel,
+    pas à l'import du module.
+    """
+    global _session
+    if _session is None:
+        _session = requests_cache.CachedSession(
+            'deputes_http_cache', backend='sqlite', expire_after=3600, cache_control=True
+        )
+    return _session
 
 def download_deputes_simple():
     """
@@ -19,26 +41,32 @@ def download_deputes_simple():
     
     try:
         # Télécharger les données JSON
-        response = requests.get(url)
+        response = get_session().get(url)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         # Extraire la liste des députés 
-        deputes_data = []
-        for depute_info in data['deputes']:
-            depute = depute_info['depute']
-            deputes_data.append(depute)
+        deputes_data = [d['depute'] for d in data['deputes']]
         
-        # Créer DataFrame
-        df = pd.DataFrame(deputes_data)
+        # Créer DataFrame (schéma connu : pas de découverte des colonnes)
+        df = deputes_to_dataframe(deputes_data)
         
-        # Sauvegarder
+        # Sauvegarder (CSV lisible + Parquet pour les analyses)
         output_file = "deputes_france.csv"
-        df.to_csv(output_file, index=False, encoding='utf-8-sig')
-        
+        write_csv(df, output_file)
         print(f"✅ {len(df)} députés téléchargés")
         print(f"📁 Fichier sauvé: {output_file}")
         
+        # Copie Parquet pour l'analyse : son échec ne doit pas perdre le CSV
+        parquet_file = Path("deputes_france.parquet")
+        try:
+            df.to_parquet(parquet_file, compression="zstd")
+            print(f"📁 Fichier sauvé: {parquet_file}")
+        except Exception as e:
+            # Une ancienne copie serait lue à la place du nouveau CSV
+            parquet_file.unlink(missing_ok=True)
+            print(f"⚠️ Copie Parquet non écrite: {e}")
+        
         # Afficher les colonnes disponibles
         print(f"\n📋 Colonnes disponibles ({len(df.columns)}):")
         for i, col in enumerate(df.columns, 1):
@@ -69,9 +97,9 @@ def download_deputes_enrichi():
     url = "https://www.nosdeputes.fr/synthese/data/json"
     
     try:
-        response = requests.get(url)
+        response = get_session().get(url)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         # Créer un DataFrame avec les statistiques disponibles
         if 'deputes' in data:
@@ -81,7 +109,7 @@ def download_deputes_enrichi():
             return None
         
         output_file = "deputes_statistiques.csv"
-        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        write_csv(df, output_file)
         
         print(f"✅ {len(df)} députés avec statistiques téléchargés")
         print(f"📁 Fichier sauvé: {output_file}")
@@ -102,9 +130,9 @@ def download_single_depute(slug):
     url = f"https://www.nosdeputes.fr/{slug}/json"
     
     try:
-        response = requests.get(url)
+        response = get_session().get(url)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         print(f"📄 Détails de {data['depute']['nom']}:")
         print(f"   Circonscription: {data['depute']['nom_circo']}")
@@ -130,4 +158,5 @@ if __name__ == "__main__":
     print("\n🎉 Téléchargement terminé!")
     print("\n💡 Utilisation:")
     print("   - deputes_france.csv : Liste complète des députés")
+    print("   - deputes_france.parquet : Même liste, format colonnaire pour l'analyse")
     print("   - deputes_statistiques.csv : Avec scores de participation, loyauté, etc.")
@@ -0,0 +1,56 @@
+"""
+Tests de fumée du téléchargeur (sans accès réseau)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, sentinel
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deputes_downloader import DeputesDownloader
+
+URL = "https://www.nosdeputes.fr/deputes/json"
+
+
+class GetTest(unittest.IsolatedAsyncioTestCase):
+    """Requêtes GET via le client ouvert par ``async with``"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.downloader = DeputesDownloader(output_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def test_get_delegue_au_client(self):
+        self.downloader.client = AsyncMock()
+        self.downloader.client.get.return_value = sentinel.response
+
+        response = await self.downloader._get(URL)
+
+        self.assertIs(response, sentinel.response)
+        self.downloader.client.get.assert_awaited_once_with(URL)
+
+    async def test_get_sans_client_ouvert(self):
+        with self.assertRaisesRegex(RuntimeError, "async with"):
+            await self.downloader._get(URL)
+
+
+class GetDeputeDetailsTest(unittest.IsolatedAsyncioTestCase):
+    """Détails d'un député hors du bloc ``async with``"""
+
+    async def test_erreur_explicite_sans_client_ouvert(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = DeputesDownloader(output_dir=tmp)
+            with self.assertLogs('deputes_downloader', level='ERROR') as logs:
+                details = await downloader.get_depute_details("emmanuel-macron")
+
+        self.assertIsNone(details)
+        self.assertIn("async with", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()